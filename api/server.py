@@ -1,11 +1,23 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
 from pydantic import BaseModel
-from src.utils import LogManager
+from src.utils import LogManager, CommandManager
 import asyncio
+import orjson
 from typing import Optional, Dict, Any
 
 app = FastAPI()
 log_manager = LogManager()
+command_manager = CommandManager()
+
+@app.on_event("startup")
+async def start_broadcast_broker():
+    await log_manager.start_broker()
+    await command_manager.start_broker()
+
+@app.on_event("shutdown")
+async def stop_broadcast_broker():
+    await log_manager.stop_broker()
+    await command_manager.stop_broker()
 
 # --- Modèles de Données ---
 class LogMessage(BaseModel):
@@ -22,10 +34,9 @@ class OrderRequest(BaseModel):
     price: Optional[float] = None
     type: str = "MARKET"
 
-# --- État Partagé (Simulation pour l'instant, à connecter au vrai moteur plus tard) ---
-# Dans une architecture idéale, le serveur API communiquerait avec le moteur via Redis ou ZMQ.
-# Ici, pour simplifier, on va juste broadcaster les commandes comme des logs "spéciaux"
-# que le bot pourrait écouter, ou simuler l'action.
+# --- Canal moteur ---
+# Les commandes partent en JSON sur /ws/commands (écouté par le moteur) ;
+# /ws/logs ne transporte que l'affichage pour l'UI.
 
 @app.post("/internal/broadcast")
 async def broadcast_log_internal(payload: Dict[str, Any]):
@@ -33,17 +44,40 @@ async def broadcast_log_internal(payload: Dict[str, Any]):
     Endpoint interne générique.
     Accepte tout JSON et le diffuse tel quel aux clients WebSocket.
     """
-    # On convertit le dict en string JSON pour le transport WebSocket
-    import json
-    await log_manager.broadcast(json.dumps(payload))
+    # On convertit le dict en string JSON pour le transport WebSocket (frame texte)
+    await log_manager.broadcast(orjson.dumps(payload).decode())
     return {"status": "ok"}
 
+@app.websocket("/internal/push")
+async def internal_push(websocket: WebSocket):
+    """
+    Canal interne persistant (moteur -> API) : chaque frame JSON reçue est diffusée
+    telle quelle aux clients /ws/logs, sans requête HTTP par message.
+    """
+    await websocket.accept()
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            text = message.get("text")
+            if text is None and message.get("bytes") is not None:
+                text = message["bytes"].decode()
+            if text:
+                await log_manager.broadcast(text)
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        print(f"Erreur canal interne: {e}")
+
 @app.post("/orders/execute")
 async def execute_order(order: OrderRequest):
-    """Reçoit un ordre manuel depuis l'UI et le diffuse."""
+    """Reçoit un ordre manuel depuis l'UI, le transmet au moteur et l'affiche dans les logs."""
     try:
+        command = {"side": order.side, "qty": order.qty, "symbol": order.symbol, "type": order.type, "price": order.price}
         log_msg = f"⚠️ ORDRE MANUEL REÇU: {order.side} {order.qty} {order.symbol} ({order.type})"
-        # On lance le broadcast en tâche de fond pour ne pas bloquer la réponse HTTP
+        # On lance les broadcasts en tâche de fond pour ne pas bloquer la réponse HTTP
+        asyncio.create_task(command_manager.broadcast(orjson.dumps(command).decode()))
         asyncio.create_task(log_manager.broadcast(log_msg))
     except Exception as e:
         print(f"❌ Erreur execute_order: {e}")
@@ -58,18 +92,24 @@ async def panic_mode():
     # TODO: Implémenter la logique d'arrêt d'urgence
     return {"status": "panic_activated"}
 
-@app.websocket("/ws/logs")
-async def websocket_endpoint(websocket: WebSocket):
-    await log_manager.connect(websocket)
+async def _serve_websocket(manager: LogManager, websocket: WebSocket):
+    await manager.connect(websocket)
     try:
-        while True:
-            # Garder la connexion active
-            data = await websocket.receive_text()
-            # Si on reçoit un ping, on ne fait rien (ça maintient juste la connexion)
-            if data == "ping":
-                pass
+        # Le keepalive est assuré par les ping/pong protocolaires d'uvicorn (--ws-ping-interval) :
+        # on attend juste la fermeture, sans décoder les frames entrantes.
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
     except WebSocketDisconnect:
-        log_manager.disconnect(websocket)
+        pass
     except Exception as e:
         print(f"Erreur WebSocket: {e}") # Log serveur
-        log_manager.disconnect(websocket)
+    finally:
+        manager.disconnect(websocket)
+
+@app.websocket("/ws/logs")
+async def websocket_endpoint(websocket: WebSocket):
+    await _serve_websocket(log_manager, websocket)
+
+@app.websocket("/ws/commands")
+async def commands_endpoint(websocket: WebSocket):
+    await _serve_websocket(command_manager, websocket)
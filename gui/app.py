@@ -1,11 +1,13 @@
 import flet as ft
 import websockets
 import asyncio
-import json
+import orjson
 import httpx
+import numpy as np
 from collections import deque
-from datetime import datetime
+import time
 import os
+import random
 
 # Endpoints locaux
 API_URL = "http://localhost:8000"
@@ -13,6 +15,24 @@ WS_URL = "ws://localhost:8000/ws/logs"
 
 # Rythme de rafraîchissement UI (s)
 REFRESH_RATE = 0.5
+# Lignes de log réellement montées dans le ListView (l'historique complet reste dans state.logs)
+LOG_VIEW_LINES = 80
+# Délai de stabilisation de la saisie du symbole avant application au filtre ticker (s)
+SYMBOL_DEBOUNCE = 0.25
+# Frames WS en attente entre la lecture du socket et leur application à l'état
+WS_QUEUE_SIZE = 256
+# Capacité de l'anneau equity — 2 minutes @ 500ms
+CHART_POINTS = 240
+# Plafond du backoff de reconnexion WS (s)
+WS_RETRY_MAX = 30
+
+# Couleur des lignes de log par mot-clé (ordre = priorité), table construite une seule fois
+_LOG_COLOR = {"BUY": "#2ECC71", "SELL": "#E74C3C", "CLOSE": "#F39C12"}
+_LOG_COLOR_DEFAULT = "#A0A0A0"
+
+def log_color(txt: str) -> str:
+    """Couleur du premier mot-clé trouvé dans la ligne, sinon gris."""
+    return next((color for key, color in _LOG_COLOR.items() if key in txt), _LOG_COLOR_DEFAULT)
 
 class AppState:
     """État partagé entre WebSocket et rafraîchissement UI."""
@@ -21,16 +41,92 @@ class AppState:
         self.balance = 10000.0
         self.equity = 10000.0
         self.pnl_pct = 0.0
-        self.chart_data = deque(maxlen=240)  # 2 minutes @ 500ms
+        # Anneau equity en colonnes (SoA) : capacité fixe, écriture en tête modulo CHART_POINTS
+        self.chart_x = np.zeros(CHART_POINTS, dtype=np.int64)
+        self.chart_y = np.full(CHART_POINTS, 10000.0, dtype=np.float64)
+        self.chart_labels: list[str] = [""] * CHART_POINTS  # "HH:MM" par slot
+        self.chart_len = 0
+        self.chart_head = 0  # prochain slot écrit
+        self.chart_seq = 0  # abscisse monotone : X stable même après éviction
+        # Points arrivés depuis la dernière frame, bornés : fenêtre réduite => seuls les CHART_POINTS derniers comptent
+        self.chart_pending: deque[tuple[int, float]] = deque(maxlen=CHART_POINTS)
+        self.chart_marks: deque[tuple[int, str]] = deque()  # repères d'axe toutes les 10 minutes
+        self.last_minmax: tuple[float, float] | None = None
+        self.last_axis_key = None
         self.positions: dict[str, dict] = {}
-        self.logs = deque(maxlen=500)
-        self.last_msg = "-"
+        self.positions_version = 0  # incrémenté seulement si le contenu des positions change
+        self.logs: deque[str] = deque(maxlen=500)  # historique texte complet (export / vue complète)
+        # (texte, couleur) à monter à la prochaine frame, bornés à ce que la vue affiche
+        self.pending_logs: deque[tuple[str, str]] = deque(maxlen=LOG_VIEW_LINES)
+        self.last_tick: tuple[str, float] | None = None  # brut, formaté seulement au rendu
+        self.ts_cache: tuple[int, str] = (0, "")  # (seconde epoch, "HH:MM:SS")
         self.connected = False
         self.lockout = False
         self.selected_symbol = "BTCUSDT"
+        self.symbol_task: asyncio.Task | None = None
+        # Réveil de l'unique tâche de rendu (ui_loop) : seul écrivain de page.update()
+        self.flush_event = asyncio.Event()
+        self.flush_event.set()
+        self.visible = True  # False quand la fenêtre est réduite : l'état vit, le rendu attend
+        # Client HTTP réutilisé (keep-alive) pour les ordres / panic
+        self.http: httpx.AsyncClient | None = None
+
+    def push_chart_point(self, label: str, y: float):
+        """Écrit un point equity en tête de l'anneau et maintient les repères d'axe."""
+        self.chart_seq += 1
+        x = self.chart_seq
+        i = self.chart_head
+        evicting = self.chart_len == CHART_POINTS
+        self.chart_x[i] = x
+        self.chart_y[i] = y
+        self.chart_labels[i] = label
+        self.chart_head = (i + 1) % CHART_POINTS
+        if not evicting:
+            self.chart_len += 1
+        self.chart_pending.append((x, y))
+        # "HH:MM" avec minute % 10 == 0 <=> dernier caractère "0" (pas de strptime)
+        if label.endswith("0") and (not self.chart_marks or self.chart_marks[-1][1] != label):
+            self.chart_marks.append((x, label))
+        if evicting:
+            first_x = self.chart_first()[0]
+            while self.chart_marks and self.chart_marks[0][0] < first_x:
+                self.chart_marks.popleft()
+
+    def _chart_oldest(self) -> int:
+        return self.chart_head if self.chart_len == CHART_POINTS else 0
+
+    def chart_first(self) -> tuple[int, str]:
+        """(x, "HH:MM") du point le plus ancien encore affiché."""
+        i = self._chart_oldest()
+        return int(self.chart_x[i]), self.chart_labels[i]
+
+    def chart_last_y(self) -> float:
+        return float(self.chart_y[(self.chart_head - 1) % CHART_POINTS])
+
+    def chart_bounds(self) -> tuple[float, float]:
+        """Min/max vectorisés sur la partie remplie (l'ordre des slots est indifférent)."""
+        filled = self.chart_y[:self.chart_len]
+        return float(np.min(filled)), float(np.max(filled))
+
+    def mark_dirty(self):
+        """Signale un changement d'état à afficher à la prochaine frame."""
+        self.flush_event.set()
+
+    def clock(self) -> str:
+        """Heure locale "HH:MM:SS", reformatée au plus une fois par seconde."""
+        now = int(time.time())
+        if now != self.ts_cache[0]:
+            self.ts_cache = (now, time.strftime("%H:%M:%S", time.localtime(now)))
+        return self.ts_cache[1]
 
 state = AppState()
 
+def get_http() -> httpx.AsyncClient:
+    """Client httpx partagé, créé au premier clic."""
+    if state.http is None or state.http.is_closed:
+        state.http = httpx.AsyncClient(base_url=API_URL, timeout=3.0)
+    return state.http
+
 async def main(page: ft.Page):
     page.title = "TradingBiBot Cockpit - FR"
     page.theme_mode = ft.ThemeMode.DARK
@@ -47,10 +143,24 @@ async def main(page: ft.Page):
     status_led = ft.Container(width=10, height=10, bgcolor="#555", border_radius=5)
     
     price_text = ft.Text("0.00 $", size=42, weight=ft.FontWeight.BOLD, font_family="Mono")
+    last_msg_text = ft.Text("-", color="#777", size=10)
     
-    def on_symbol_change(e):
-        state.selected_symbol = symbol_input.value.strip().upper() or "BTCUSDT"
-    symbol_input = ft.TextField(label="Symbole", value="BTCUSDT", width=120, dense=True, text_size=12, on_change=on_symbol_change)
+    async def _apply_symbol_after(delay: float, value: str):
+        await asyncio.sleep(delay)
+        state.selected_symbol = value
+
+    async def on_symbol_change(e):
+        # Deux champs distincts (un contrôle = un parent) gardés en miroir l'un de l'autre
+        other = symbol_input_order if e.control is symbol_input_ticker else symbol_input_ticker
+        other.value = e.control.value
+        state.mark_dirty()
+        # Debounce : seule la valeur finale (après SYMBOL_DEBOUNCE sans frappe) atteint le filtre WS
+        if state.symbol_task is not None and not state.symbol_task.done():
+            state.symbol_task.cancel()
+        value = e.control.value.strip().upper() or "BTCUSDT"
+        state.symbol_task = asyncio.create_task(_apply_symbol_after(SYMBOL_DEBOUNCE, value))
+    symbol_input_ticker = ft.TextField(label="Symbole", value="BTCUSDT", width=120, dense=True, text_size=12, on_change=on_symbol_change)
+    symbol_input_order = ft.TextField(label="Symbole", value="BTCUSDT", width=120, dense=True, text_size=12, on_change=on_symbol_change)
     
     balance_text = ft.Text("$ 10,000.00", size=24, weight=ft.FontWeight.BOLD, font_family="Mono")
     pnl_text = ft.Text("+0.00%", size=16, color="green", font_family="Mono")
@@ -58,10 +168,10 @@ async def main(page: ft.Page):
 
     # --- Chart Equity (Amélioré) ---
     chart_series = ft.LineChartData(
-        data_points=[ft.LineChartDataPoint(0, 10000)],
+        data_points=[],
         stroke_width=2,
         color="#5CE1E6",
-        curved=True,
+        curved=False,  # polyline : pas de spline recalculée sur toute la série à chaque frame
         stroke_cap_round=True,
         point=False,
     )
@@ -88,6 +198,8 @@ async def main(page: ft.Page):
         ],
         rows=[],
     )
+    # symbole -> (DataRow, [Text x6]) réutilisés d'une frame à l'autre
+    row_cache: dict[str, tuple[ft.DataRow, list[ft.Text]]] = {}
 
     # --- Logs ---
     logs_view = ft.ListView(spacing=2, expand=True, auto_scroll=True)
@@ -95,7 +207,7 @@ async def main(page: ft.Page):
     # --- Actions (Export Logs) ---
     def export_logs(e):
         # Concatène les logs et les copie dans le presse-papiers (mac/desktop)
-        buffer = "\n".join([log_line.value for log_line in state.logs])
+        buffer = "\n".join(state.logs)
         try:
             page.set_clipboard(buffer)
             page.show_snack_bar(ft.SnackBar(content=ft.Text("Logs copiés dans le presse-papiers")))
@@ -104,11 +216,25 @@ async def main(page: ft.Page):
 
     export_btn = ft.ElevatedButton("💾 Exporter Logs", on_click=export_logs, height=30)
 
+    # Vue complète à la demande : l'historique n'est sérialisé qu'à l'ouverture
+    async def show_full_logs(e):
+        page.dialog = ft.AlertDialog(
+            title=ft.Text("Journal complet"),
+            content=ft.TextField(
+                value="\n".join(state.logs), multiline=True, read_only=True,
+                text_style=ft.TextStyle(font_family="Mono", size=12), width=900, height=500,
+            ),
+        )
+        page.dialog.open = True
+        state.mark_dirty()
+
+    full_logs_btn = ft.TextButton("Tout afficher", on_click=show_full_logs, height=30)
+
     # --- Actions Trading ---
     qty_input = ft.TextField(label="Taille", value="0.01", width=100, dense=True)
 
     async def send_order(side: str):
-        symbol = symbol_input.value.strip().upper()
+        symbol = symbol_input_order.value.strip().upper()
         try:
             qty = float(qty_input.value)
         except ValueError:
@@ -116,21 +242,19 @@ async def main(page: ft.Page):
 
         payload = {"symbol": symbol, "side": side, "qty": qty}
         try:
-            async with httpx.AsyncClient() as client:
-                await client.post(f"{API_URL}/orders/execute", json=payload, timeout=3.0)
+            await get_http().post("/orders/execute", json=payload)
             add_log(f"⚠️ ORDRE MANUEL ENVOYÉ: {side} {qty} {symbol}", color="orange")
         except Exception as e:
             add_log(f"❌ Erreur envoi: {e}", color="red")
 
     async def send_panic(_):
         try:
-            async with httpx.AsyncClient() as client:
-                await client.post(f"{API_URL}/panic", timeout=3.0)
+            await get_http().post("/panic")
             state.lockout = True
             panic_btn.text = "VERROUILLÉ"
             panic_btn.disabled = True
             panic_btn.bgcolor = "#333"
-            page.update()
+            state.mark_dirty()
         except Exception as e:
             add_log(f"❌ Erreur panic: {e}", color="red")
 
@@ -140,13 +264,11 @@ async def main(page: ft.Page):
 
     # --- Helper Logs ---
     def add_log(message: str, color: str = "#e0e0e0"):
-        ts = datetime.now().strftime("%H:%M:%S")
-        line = ft.Text(f"[{ts}] {message}", color=color, font_family="Mono", size=12, selectable=True)
-        state.logs.append(line)
-        logs_view.controls.append(line)
-        if len(logs_view.controls) > 500:
-            logs_view.controls.pop(0)
-        page.update()
+        ts = state.clock()
+        text = f"[{ts}] {message}"
+        state.logs.append(text)
+        state.pending_logs.append((text, color))
+        state.mark_dirty()
 
     # --- Layout ---
     header = ft.Row(
@@ -162,9 +284,9 @@ async def main(page: ft.Page):
     price_card = ft.Container(
         bgcolor="#0F1116", border_radius=12, padding=16,
         content=ft.Column([
-            ft.Row([ft.Text("Symbole", color="#888"), symbol_input], alignment="spaceBetween"),
+            ft.Row([ft.Text("Symbole", color="#888"), symbol_input_ticker], alignment="spaceBetween"),
             price_text,
-            ft.Text(state.last_msg, color="#777", size=10),
+            last_msg_text,
         ]),
     )
 
@@ -181,7 +303,7 @@ async def main(page: ft.Page):
         bgcolor="#0F1116", border_radius=12, padding=16,
         content=ft.Column([
             ft.Text("Ordres manuels", weight="bold"),
-            ft.Row([symbol_input, qty_input], spacing=8),
+            ft.Row([symbol_input_order, qty_input], spacing=8),
             ft.Row([buy_btn, sell_btn, panic_btn], spacing=8),
         ], spacing=10),
     )
@@ -201,7 +323,7 @@ async def main(page: ft.Page):
     logs_card = ft.Container(
         bgcolor="#0B0C0F", border_radius=12, padding=12, height=250,
         content=ft.Column([
-            ft.Row([ft.Text("Journal Système", color="#888"), export_btn], alignment="spaceBetween"),
+            ft.Row([ft.Text("Journal Système", color="#888"), ft.Row([full_logs_btn, export_btn])], alignment="spaceBetween"),
             logs_view
         ], expand=True),
     )
@@ -215,108 +337,186 @@ async def main(page: ft.Page):
 
     # --- UI Loop ---
     async def ui_loop():
+        drawn_positions_version = -1
+        drawn_tick = None
         while True:
+            # L'événement fixe le débit minimal (rien à faire => pas de frame),
+            # le sleep en fin de boucle le débit maximal (throttling à REFRESH_RATE)
+            await state.flush_event.wait()
+            if not state.visible:
+                # Fenêtre réduite : aucun diff envoyé, les changements restent en attente
+                await asyncio.sleep(1.0)
+                continue
+            state.flush_event.clear()
+
             price_text.value = f"{state.price:,.2f} $"
+            # Seul le dernier ticker reçu entre deux frames est formaté
+            if state.last_tick is not None and state.last_tick is not drawn_tick:
+                drawn_tick = state.last_tick
+                last_msg_text.value = f"{drawn_tick[0]} @ {drawn_tick[1]}"
             balance_text.value = f"$ {state.equity:,.2f}"
             pnl_text.value = f"{state.pnl_pct:+.2f}%"
             pnl_text.color = "#2ECC71" if state.pnl_pct >= 0 else "#E74C3C"
 
-            if state.chart_data:
-                vals = [y for _, y in state.chart_data]
-                # Mise à jour des points (index séquentiels)
-                chart_series.data_points = [
-                    ft.LineChartDataPoint(i, y) for i, (_, y) in enumerate(state.chart_data)
-                ]
-                # Axes dynamiques
-                chart.min_y = min(vals) * 0.999
-                chart.max_y = max(vals) * 1.001
-                # Labels heure toutes les ~10 minutes (si dispo)
-                labels = []
-                for idx, (ts, _) in enumerate(state.chart_data):
-                    if idx == 0:
-                        labels.append(ft.ChartAxisLabel(value=idx, label=ft.Text(ts)))
-                    else:
-                        try:
-                            dt = datetime.strptime(ts, "%H:%M")
-                            if dt.minute % 10 == 0:
-                                labels.append(ft.ChartAxisLabel(value=idx, label=ft.Text(ts)))
-                        except Exception:
-                            pass
-                chart.bottom_axis = ft.ChartAxis(labels_size=30, labels=labels)
-
-            rows = []
-            for sym, pos in state.positions.items():
-                pnl_val = pos.get("pnl", 0.0)
-                rows.append(ft.DataRow(cells=[
-                    ft.DataCell(ft.Text(sym)),
-                    ft.DataCell(ft.Text(pos.get("side", ""))),
-                    ft.DataCell(ft.Text(f"{pos.get('entry', 0):,.2f}")),
-                    ft.DataCell(ft.Text(f"{pos.get('mark', 0):,.2f}")),
-                    ft.DataCell(ft.Text(f"{pos.get('qty', 0):,.4f}")),
-                    ft.DataCell(ft.Text(f"{pnl_val:,.2f} $", color="green" if pnl_val >= 0 else "red")),
-                ]))
-            positions_table.rows = rows
-            positions_count.value = f"{len(state.positions)} positions"
+            if state.chart_pending:
+                # Ajout incrémental des nouveaux points, éviction par tranche en tête
+                points = chart_series.data_points
+                points.extend(ft.LineChartDataPoint(x, y) for x, y in state.chart_pending)
+                state.chart_pending.clear()
+                overflow = len(points) - CHART_POINTS
+                if overflow > 0:
+                    del points[:overflow]
+                # Axes dynamiques (réassignés seulement s'ils bougent)
+                lo, hi = state.chart_bounds()
+                bounds = (lo * 0.999, hi * 1.001)
+                if bounds != state.last_minmax:
+                    state.last_minmax = bounds
+                    chart.min_y, chart.max_y = bounds
+                # Label du premier point + repères toutes les ~10 minutes (si dispo)
+                first_x, first_ts = state.chart_first()
+                axis_key = (first_x, state.chart_marks[-1][0] if state.chart_marks else None)
+                if axis_key != state.last_axis_key:
+                    state.last_axis_key = axis_key
+                    labels = [ft.ChartAxisLabel(value=first_x, label=ft.Text(first_ts))]
+                    labels += [
+                        ft.ChartAxisLabel(value=x, label=ft.Text(ts))
+                        for x, ts in state.chart_marks if x != first_x
+                    ]
+                    chart.bottom_axis = ft.ChartAxis(labels_size=30, labels=labels)
+
+            if state.pending_logs:
+                # Montage des logs par lot : un extend + une seule coupe en tête par frame
+                logs_view.controls.extend(
+                    ft.Text(text, color=color, font_family="Mono", size=12, selectable=True)
+                    for text, color in state.pending_logs
+                )
+                state.pending_logs.clear()
+                overflow = len(logs_view.controls) - LOG_VIEW_LINES
+                if overflow > 0:
+                    del logs_view.controls[:overflow]
+
+            if state.positions_version != drawn_positions_version:
+                drawn_positions_version = state.positions_version
+                # Lignes construites une fois par symbole puis mises à jour sur place ;
+                # la liste rows n'est réassignée que si l'ensemble des symboles change
+                symbols_changed = row_cache.keys() != state.positions.keys()
+                for sym in [k for k in row_cache if k not in state.positions]:
+                    del row_cache[sym]
+                for sym, pos in state.positions.items():
+                    cached = row_cache.get(sym)
+                    if cached is None:
+                        texts = [ft.Text(sym)] + [ft.Text("") for _ in range(5)]
+                        cached = row_cache[sym] = (ft.DataRow(cells=[ft.DataCell(t) for t in texts]), texts)
+                    texts = cached[1]
+                    pnl_val = pos.get("pnl", 0.0)
+                    texts[1].value = pos.get("side", "")
+                    texts[2].value = f"{pos.get('entry', 0):,.2f}"
+                    texts[3].value = f"{pos.get('mark', 0):,.2f}"
+                    texts[4].value = f"{pos.get('qty', 0):,.4f}"
+                    texts[5].value = f"{pnl_val:,.2f} $"
+                    texts[5].color = "green" if pnl_val >= 0 else "red"
+                if symbols_changed:
+                    positions_table.rows = [row_cache[sym][0] for sym in state.positions]
+                    positions_count.value = f"{len(state.positions)} positions"
 
             page.update()
             await asyncio.sleep(REFRESH_RATE)
 
     # --- WebSocket Listener ---
+    def apply_message(msg):
+        """Applique une frame WS à l'état partagé (aucun accès réseau ni page.update())."""
+        data = orjson.loads(msg)
+        msg_type = data.get("type")
+
+        if msg_type == "ticker":
+            symbol = str(data.get("symbol", "")).upper()
+            if symbol == state.selected_symbol:
+                state.price = float(data.get("price", state.price))
+                state.last_tick = (symbol, state.price)
+                state.mark_dirty()
+
+        elif msg_type == "pnl":
+            state.balance = float(data.get("balance", state.balance))
+            state.equity = float(data.get("equity", state.equity))
+            state.pnl_pct = ((state.equity - 10000) / 10000) * 100
+            state.mark_dirty()
+            now_str = state.clock()[:5]
+            # Filtre anti-outlier (>50% vs dernier point)
+            if state.chart_len:
+                last_val = state.chart_last_y()
+                if last_val > 0 and abs(state.equity - last_val) / last_val > 0.5:
+                    return
+            state.push_chart_point(now_str, state.equity)
+            positions = {p["symbol"]: p for p in data.get("positions", [])}
+            if positions != state.positions:
+                state.positions = positions
+                state.positions_version += 1
+
+        elif msg_type in ("log", "trade"):
+            txt = data.get("message", "")
+            add_log(txt, log_color(txt))
+
+    async def ws_applier(queue: asyncio.Queue):
+        """Second étage : décode et applique les frames, découplé de la lecture socket."""
+        while True:
+            msg = await queue.get()
+            try:
+                apply_message(msg)
+            except orjson.JSONDecodeError:
+                pass
+            except Exception as e:
+                print(f"⚠️ Frame WS ignorée: {e}")
+
     async def ws_listener():
+        """Premier étage : lit le socket et empile les frames brutes."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=WS_QUEUE_SIZE)
+        page.run_task(ws_applier, queue)
+        retry = 0
         while True:
             try:
                 status_led.bgcolor = "#CC8400"
                 status_chip.value = "Connexion..."
-                page.update()
+                state.mark_dirty()
                 
                 async with websockets.connect(WS_URL) as ws:
+                    retry = 0
                     status_led.bgcolor = "#2ECC71"
                     status_chip.value = "Connecté"
-                    page.update()
+                    state.mark_dirty()
                     
                     async for msg in ws:
-                        try:
-                            data = json.loads(msg)
-                            msg_type = data.get("type")
-
-                            if msg_type == "ticker":
-                                symbol = str(data.get("symbol", "")).upper()
-                                if symbol == state.selected_symbol:
-                                    state.price = float(data.get("price", state.price))
-                                    state.last_msg = f"{symbol} @ {state.price}"
-
-                            elif msg_type == "pnl":
-                                state.balance = float(data.get("balance", state.balance))
-                                state.equity = float(data.get("equity", state.equity))
-                                state.pnl_pct = ((state.equity - 10000) / 10000) * 100
-                                now_str = datetime.now().strftime("%H:%M")
-                                # Filtre anti-outlier (>50% vs dernier point)
-                                if state.chart_data:
-                                    last_val = state.chart_data[-1][1]
-                                    if last_val > 0 and abs(state.equity - last_val) / last_val > 0.5:
-                                        continue
-                                state.chart_data.append((now_str, state.equity))
-                                positions = data.get("positions", [])
-                                state.positions = {p["symbol"]: p for p in positions}
-
-                            elif msg_type in ("log", "trade"):
-                                txt = data.get("message", "")
-                                color = "#A0A0A0"
-                                if "BUY" in txt: color = "#2ECC71"
-                                elif "SELL" in txt: color = "#E74C3C"
-                                elif "CLOSE" in txt: color = "#F39C12"
-                                add_log(txt, color)
-
-                        except json.JSONDecodeError:
-                            pass
+                        await queue.put(msg)
             except Exception:
                 status_led.bgcolor = "#E74C3C"
                 status_chip.value = "Déconnecté (retry...)"
-                page.update()
-                await asyncio.sleep(2)
-
+                state.mark_dirty()
+                # Backoff exponentiel + jitter : serveur arrêté = réveils de plus en plus espacés
+                await asyncio.sleep(min(WS_RETRY_MAX, 2 ** retry) + random.random())
+                retry += 1
+
+    async def on_disconnect(_):
+        if state.http is not None:
+            await state.http.aclose()
+            state.http = None
+    page.on_disconnect = on_disconnect
+
+    async def on_window_event(e):
+        if e.data == "minimize":
+            state.visible = False
+        elif e.data in ("restore", "maximize", "focus"):
+            state.visible = True
+            state.mark_dirty()
+    page.on_window_event = on_window_event
+
+    # Rendu et réception sur des tâches distinctes : main() rend la main, Flet garde la page
     page.run_task(ui_loop)
-    await ws_listener()
+    page.run_task(ws_listener)
 
 if __name__ == "__main__":
+    # uvloop (si disponible) : la politique s'applique aussi aux boucles créées par Flet
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     ft.app(target=main)
@@ -3,7 +3,8 @@ import websockets
 import asyncio
 import httpx
 import re
-from datetime import datetime
+from collections import deque
+import time
 
 # Configuration
 API_URL = "http://localhost:8000"
@@ -18,6 +19,14 @@ COLOR_DANGER = "#ff0055"   # Rouge Cyberpunk
 COLOR_TEXT = "#e0e0e0"
 FONT_MONO = "Courier New"
 
+# Logs : historique affiché, délai de regroupement (s) et taille max d'un lot avant flush immédiat
+LOG_HISTORY = 500
+LOG_FLUSH_DELAY = 0.05
+LOG_BATCH_MAX = 128
+
+# Motif "PnL: 12.50" / "PnL: -5.00", compilé une seule fois
+_PNL_RE = re.compile(r"PnL:\s*([+-]?\d+(?:\.\d*)?)")
+
 async def main(page: ft.Page):
     page.title = "TRADING COCKPIT v1.0"
     page.theme_mode = ft.ThemeMode.DARK
@@ -27,6 +36,21 @@ async def main(page: ft.Page):
     page.window_height = 800
 
     # --- État ---
+    # Client HTTP réutilisé (keep-alive) pour panic / ordres : fermé à la déconnexion de la page,
+    # recréé au besoin si la session navigateur se reconnecte
+    http: httpx.AsyncClient | None = None
+
+    def get_http() -> httpx.AsyncClient:
+        nonlocal http
+        if http is None or http.is_closed:
+            http = httpx.AsyncClient(base_url=API_URL, timeout=2.0)
+        return http
+
+    async def on_disconnect(_):
+        if http is not None:
+            await http.aclose()
+    page.on_disconnect = on_disconnect
+
     pnl_value = ft.Text("0.00 $", size=24, weight="bold", color=COLOR_ACCENT, font_family=FONT_MONO)
     
     # --- Composants UI ---
@@ -70,23 +94,21 @@ async def main(page: ft.Page):
     async def trigger_panic(e):
         btn_panic.content = ft.ProgressRing(width=20, height=20, color="white")
         btn_panic.disabled = True
-        page.update()
+        schedule_update()
         try:
-            async with httpx.AsyncClient() as client:
-                await client.post(f"{API_URL}/panic", timeout=2.0)
-                add_log("🚨 PANIC SIGNAL SENT TO CORE ENGINE", COLOR_DANGER)
+            await get_http().post("/panic")
+            add_log("🚨 PANIC SIGNAL SENT TO CORE ENGINE", COLOR_DANGER)
         except Exception as ex:
             add_log(f"❌ ERROR SENDING PANIC: {ex}", "red")
         finally:
             btn_panic.content = ft.Text("KILL SWITCH (PANIC)", size=16, weight="bold")
             btn_panic.disabled = False
-            page.update()
+            schedule_update()
 
     async def trigger_buy(e):
         try:
             payload = {"symbol": "BTCUSDT", "side": "BUY", "qty": 0.01, "type": "MARKET"}
-            async with httpx.AsyncClient() as client:
-                await client.post(f"{API_URL}/orders/execute", json=payload)
+            await get_http().post("/orders/execute", json=payload)
         except Exception as ex:
             add_log(f"❌ ERROR: {ex}", "red")
 
@@ -122,24 +144,67 @@ async def main(page: ft.Page):
 
     # --- Logique ---
 
+    # Toutes les modifications d'un même tick de boucle partagent un seul page.update()
+    dirty = False
+
+    def flush_update():
+        nonlocal dirty
+        if dirty:
+            dirty = False
+            page.update()
+
+    def schedule_update():
+        nonlocal dirty
+        if not dirty:
+            dirty = True
+            asyncio.get_running_loop().call_soon(flush_update)
+
+    # Anneau borné : l'éviction en tête est O(1) à l'ajout, plus de décalage de liste
+    log_buf: deque[ft.Text] = deque(maxlen=LOG_HISTORY)
+    pending_logs: list[ft.Text] = []
+    flush_task: asyncio.Task | None = None
+
+    def flush_logs():
+        # Le ListView est resynchronisé depuis l'anneau une fois par lot
+        log_buf.extend(pending_logs)
+        pending_logs.clear()
+        logs_list.controls[:] = log_buf
+        schedule_update()
+
+    async def flush_later():
+        nonlocal flush_task
+        await asyncio.sleep(LOG_FLUSH_DELAY)
+        flush_task = None
+        flush_logs()
+
     def add_log(message: str, color: str = COLOR_TEXT):
-        timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-        logs_list.controls.append(
+        nonlocal flush_task
+        # HH:MM:SS.mmm composé directement (ni objet datetime, ni %f tronqué)
+        t = time.time()
+        lt = time.localtime(t)
+        timestamp = f"{lt.tm_hour:02d}:{lt.tm_min:02d}:{lt.tm_sec:02d}.{int(t % 1 * 1000):03d}"
+        pending_logs.append(
             ft.Text(f"[{timestamp}] {message}", color=color, font_family=FONT_MONO, size=12, selectable=True)
         )
-        # Limite l'historique pour la performance
-        if len(logs_list.controls) > 500:
-            logs_list.controls.pop(0)
-        page.update()
+        if len(pending_logs) >= LOG_BATCH_MAX:
+            # Rafale : on n'attend pas le timer
+            if flush_task is not None:
+                flush_task.cancel()
+                flush_task = None
+            flush_logs()
+        elif flush_task is None:
+            flush_task = asyncio.create_task(flush_later())
 
     def parse_pnl(message: str):
-        # Cherche un pattern type "PnL: 12.50" ou "PnL: -5.00"
-        match = re.search(r"PnL:\s*([+-]?\d+\.?\d*)", message)
+        # Test de sous-chaîne avant la regex : la plupart des messages n'ont pas de PnL
+        if "PnL:" not in message:
+            return
+        match = _PNL_RE.search(message)
         if match:
             val = float(match.group(1))
             pnl_value.value = f"{val:+.2f} $"
             pnl_value.color = COLOR_ACCENT if val >= 0 else COLOR_DANGER
-            page.update()
+            schedule_update()
 
     async def websocket_loop():
         while True:
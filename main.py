@@ -3,9 +3,8 @@ import sys
 import uvloop
 import logging
 import websockets
-import httpx
+import orjson
 from typing import Optional
-from datetime import datetime
 from src import config
 from src.database import QuestDBClient
 from src.ingestion import BinanceIngestor
@@ -14,7 +13,7 @@ from src.strategy import HybridStrategy
 from src.execution import ExecutionEngine
 from src.models import Signal, Candle
 from src.learning import OnlineLearner
-from src.utils import BroadcastLogHandler
+from src.utils import BroadcastLogHandler, close_http_client
 
 # Configuration du logging
 logging.basicConfig(
@@ -35,15 +34,19 @@ logger = logging.getLogger("TradingEngine")
 TICK_QUEUE_SIZE = 5000
 CANDLE_QUEUE_SIZE = 1000
 EXECUTION_QUEUE_SIZE = 300
-# N ticks boursiers diffusés au front par échantillonnage (fan-out)
-TICKER_SAMPLE_RATE = 10
+# Période de diffusion des derniers prix au front (s) : débit borné quelle que soit l'activité du marché
+TICKER_FLUSH_INTERVAL = 0.05
+# Canal interne persistant moteur -> API pour les tickers
+TICKER_PUSH_URI = "ws://127.0.0.1:8000/internal/push"
+# Nombre max de lignes ILP regroupées par écriture socket
+ILP_BATCH_MAX = 256
 
 # --- Tâche d'écoute des commandes API (Headless Control) ---
 async def api_command_listener(execution_engine: ExecutionEngine, aggregator: TimeBarAggregator):
     """
-    Écoute les messages WebSocket du serveur API pour recevoir les ordres manuels.
+    Écoute le canal de commandes du serveur API (frames JSON) pour recevoir les ordres manuels.
     """
-    uri = "ws://localhost:8000/ws/logs"
+    uri = "ws://127.0.0.1:8000/ws/commands"
     logger.info(f"📡 Connexion au canal de commande API ({uri})...")
     
     while True:
@@ -52,43 +55,38 @@ async def api_command_listener(execution_engine: ExecutionEngine, aggregator: Ti
                 logger.info("✅ Connecté au canal de commande API.")
                 while True:
                     message = await websocket.recv()
-                    
-                    # Détection basique des ordres manuels dans les logs
-                    # Format attendu: "⚠️ ORDRE MANUEL REÇU: BUY 0.01 BTCUSDT (LIMIT)"
-                    if "ORDRE MANUEL REÇU" in message:
-                        try:
-                            # Parsing très basique (à améliorer avec un protocole structuré plus tard)
-                            parts = message.split(" ")
-                            # Ex: ['⚠️', 'ORDRE', 'MANUEL', 'REÇU:', 'BUY', '0.01', 'BTCUSDT', '(LIMIT)']
-                            side = parts[4]
-                            qty = float(parts[5])
-                            symbol = parts[6]
-                            
-                            # Récupération du prix actuel via l'aggrégateur pour éviter division par zéro
-                            current_price = 0.0
-                            if symbol in aggregator.active_candles:
-                                current_price = aggregator.active_candles[symbol].get('c', 0.0)
-                            
-                            if current_price == 0.0:
-                                logger.warning(f"⚠️ Prix inconnu pour {symbol}, ordre manuel ignoré (risque div/0)")
-                                continue
-
-                            logger.info(f"🤖 Traitement Ordre Manuel: {side} {qty} {symbol} @ {current_price}$")
-                            
-                            # Création d'un Signal
-                            signal = Signal(
-                                symbol=symbol,
-                                side=side,
-                                price=current_price,
-                                timestamp=int(asyncio.get_event_loop().time() * 1000),
-                                reason="MANUAL_UI"
-                            )
-                            
-                            # Injection directe dans le moteur
-                            await execution_engine.on_signal(signal)
-                            
-                        except Exception as e:
-                            logger.error(f"❌ Erreur parsing ordre manuel: {e}")
+
+                    # Format: {"side": "BUY", "qty": 0.01, "symbol": "BTCUSDT", "type": "MARKET", "price": null}
+                    try:
+                        command = orjson.loads(message)
+                        side = command["side"]
+                        qty = float(command["qty"])
+                        symbol = command["symbol"]
+
+                        # Récupération du prix actuel via l'aggrégateur pour éviter division par zéro
+                        candle = aggregator.active_candles.get(symbol)
+                        current_price = candle.get('c', 0.0) if candle else 0.0
+
+                        if current_price == 0.0:
+                            logger.warning(f"⚠️ Prix inconnu pour {symbol}, ordre manuel ignoré (risque div/0)")
+                            continue
+
+                        logger.info(f"🤖 Traitement Ordre Manuel: {side} {qty} {symbol} @ {current_price}$")
+
+                        # Création d'un Signal
+                        signal = Signal(
+                            symbol=symbol,
+                            side=side,
+                            price=current_price,
+                            timestamp=int(asyncio.get_event_loop().time() * 1000),
+                            reason="MANUAL_UI"
+                        )
+
+                        # Injection directe dans le moteur
+                        await execution_engine.on_signal(signal)
+
+                    except Exception as e:
+                        logger.error(f"❌ Erreur parsing ordre manuel: {e}")
 
         except asyncio.CancelledError:
             logger.info("🛑 Arrêt du listener API.")
@@ -114,10 +112,20 @@ async def pnl_broadcaster(engine: ExecutionEngine, aggregator: TimeBarAggregator
             logger.error(f"❌ Erreur PnL Broadcast: {e}")
         await asyncio.sleep(1)
 
+async def _drain_batch(queue: asyncio.Queue, max_items: int = ILP_BATCH_MAX) -> list:
+    """Attend un élément puis récupère sans attendre ceux déjà disponibles (jusqu'à max_items)."""
+    batch = [await queue.get()]
+    while len(batch) < max_items:
+        try:
+            batch.append(queue.get_nowait())
+        except asyncio.QueueEmpty:
+            break
+    return batch
+
 async def data_writer(queue: asyncio.Queue, db: QuestDBClient):
     """
     Consommateur dédié à l'écriture en base de données.
-    Dépile les messages de marché et les envoie à QuestDB via ILP.
+    Dépile les messages de marché disponibles par lots et les envoie à QuestDB via ILP.
     """
     logger.info("💾 Démarrage du Data Writer...")
 
@@ -134,20 +142,18 @@ async def data_writer(queue: asyncio.Queue, db: QuestDBClient):
                     backoff = min(backoff * 2, 30)
                     continue
 
-            data = await queue.get()
+            batch = await _drain_batch(queue)
 
             try:
-                if data.get('type') == 'trade':
-                    await db.send(
-                        table='trades',
-                        symbol=data['symbol'],
-                        price=data['price'],
-                        qty=data['qty'],
-                        side=data['side'],
-                        timestamp_ms=data['timestamp']
+                await db.send_many([
+                    QuestDBClient.trade_line(
+                        'trades', data['symbol'], data['price'], data['qty'], data['side'], data['timestamp']
                     )
+                    for data in batch if data.get('type') == 'trade'
+                ])
             finally:
-                queue.task_done()
+                for _ in batch:
+                    queue.task_done()
 
         except asyncio.CancelledError:
             logger.info("💾 Arrêt du Data Writer...")
@@ -160,7 +166,7 @@ async def data_writer(queue: asyncio.Queue, db: QuestDBClient):
 
 async def candle_writer(candle_queue: asyncio.Queue, db: QuestDBClient):
     """
-    Persiste les bougies agrégées dans QuestDB (table candles_1s).
+    Persiste les bougies agrégées dans QuestDB (table candles_1s), par lots.
     """
     backoff = 1
     while True:
@@ -175,21 +181,18 @@ async def candle_writer(candle_queue: asyncio.Queue, db: QuestDBClient):
                     backoff = min(backoff * 2, 30)
                     continue
 
-            candle = await candle_queue.get()
+            batch = await _drain_batch(candle_queue)
 
             try:
-                await db.send_ohlcv(
-                    table="candles_1s",
-                    symbol=candle.symbol,
-                    open=candle.open,
-                    high=candle.high,
-                    low=candle.low,
-                    close=candle.close,
-                    volume=candle.volume,
-                    timestamp_ms=candle.timestamp
-                )
+                await db.send_many([
+                    QuestDBClient.ohlcv_line(
+                        "candles_1s", c.symbol, c.open, c.high, c.low, c.close, c.volume, c.timestamp
+                    )
+                    for c in batch
+                ])
             finally:
-                candle_queue.task_done()
+                for _ in batch:
+                    candle_queue.task_done()
 
         except asyncio.CancelledError:
             logger.info("💾 Arrêt du Candle Writer...")
@@ -263,86 +266,30 @@ async def execution_runner(execution_queue: asyncio.Queue, engine: ExecutionEngi
         finally:
             execution_queue.task_done()
 
-async def _broadcast_ticker(client: httpx.AsyncClient, msg: dict):
-    """Envoie un ticker échantillonné au frontend (non bloquant grâce au timeout court)."""
-    if msg.get("type") != "trade":
-        return
-    symbol = msg.get("symbol")
-    price = msg.get("price")
-    if not symbol or price is None:
-        return
-
-    payload = {
-        "type": "ticker",
-        "symbol": symbol,
-        "price": price
-    }
-    try:
-        await client.post("http://localhost:8000/internal/broadcast", json=payload, timeout=0.5)
-    except Exception:
-        # Le broadcast n'est pas critique pour le moteur, on ignore silencieusement
-        pass
-
-async def fanout_dispatcher(
-    source_queue: asyncio.Queue,
-    db_queue: asyncio.Queue,
-    agg_queue: asyncio.Queue,
-    ticker_sample_rate: int = TICKER_SAMPLE_RATE
-):
+async def ticker_flusher(aggregator: TimeBarAggregator, interval: float = TICKER_FLUSH_INTERVAL):
     """
-    Dispatcher qui duplique les ticks vers la DB et l'agrégateur.
-    Inclut un broadcast échantillonné pour l'UI sans bloquer le pipeline.
+    Diffuse au front le dernier prix de chaque symbole (clôture courante de l'agrégateur),
+    toutes les `interval` secondes et seulement s'il a changé. Envoi sur une connexion
+    WebSocket persistante vers l'API (/internal/push), sans attente de réponse.
     """
-    logger.info("🔀 Démarrage du Dispatcher (fan-out DB/Aggregator)...")
-    counter = 0
-    async with httpx.AsyncClient(timeout=0.5) as client:
-        while True:
-            try:
-                msg = await source_queue.get()
-            except asyncio.CancelledError:
-                break
-
-            try:
-                if msg.get("type") == "trade":
-                    counter += 1
-                    if ticker_sample_rate and counter % ticker_sample_rate == 0:
-                        await _broadcast_ticker(client, msg)
-
-                await db_queue.put(msg)
-                await agg_queue.put(msg)
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"❌ Erreur Dispatcher: {e}")
-            finally:
-                source_queue.task_done()
-
-    logger.info("🔀 Dispatcher arrêté.")
-
-async def candle_dispatcher(
-    source_queue: asyncio.Queue,
-    strategy_queue: asyncio.Queue,
-    persist_queue: asyncio.Queue
-):
-    """Duplication des bougies: stratégie + persistance."""
-    logger.info("🪄 Démarrage du Candle Dispatcher (strategy + store)...")
+    logger.info(f"📤 Démarrage du Ticker Flusher ({TICKER_PUSH_URI})...")
     while True:
         try:
-            candle = await source_queue.get()
-        except asyncio.CancelledError:
-            break
-
-        try:
-            await strategy_queue.put(candle)
-            await persist_queue.put(candle)
+            async with websockets.connect(TICKER_PUSH_URI) as ws:
+                # Nouvelle connexion (API redémarrée) : tout est renvoyé une fois, même sans variation
+                last_sent: dict[str, float] = {}
+                while True:
+                    await asyncio.sleep(interval)
+                    for symbol, candle in list(aggregator.active_candles.items()):
+                        price = candle['c']
+                        if last_sent.get(symbol) != price:
+                            last_sent[symbol] = price
+                            await ws.send(orjson.dumps({"type": "ticker", "symbol": symbol, "price": price}))
         except asyncio.CancelledError:
             break
-        except Exception as e:
-            logger.error(f"❌ Erreur Candle Dispatcher: {e}")
-        finally:
-            source_queue.task_done()
-
-    logger.info("🪄 Candle Dispatcher arrêté.")
+        except Exception:
+            # Le broadcast n'est pas critique pour le moteur : API indisponible, on retente plus tard
+            await asyncio.sleep(2)
 
 async def warmup_strategy(strategy: HybridStrategy, learner: OnlineLearner, db_client: QuestDBClient, symbols: list[str]):
     """
@@ -387,19 +334,19 @@ async def main():
     config.config = settings # Injection de la config globale pour la stratégie
     logger.info(f"✅ Configuration chargée. QuestDB cible: {settings.QUESTDB_HOST}:{settings.QUESTDB_PORT}")
 
-    # 2. Queues (Communication Inter-Processus)
-    raw_tick_queue = asyncio.Queue()
-    db_queue = asyncio.Queue()
-    agg_queue = asyncio.Queue()
-    candle_queue = asyncio.Queue()
-    strategy_candle_queue = asyncio.Queue()
-    candle_store_queue = asyncio.Queue()
-    execution_queue = asyncio.Queue()
+    # 2. Queues (Communication Inter-Processus), toutes bornées : la mémoire reste stable en rafale.
+    # Les producteurs publient directement dans chaque queue consommatrice (pas de tâche de fan-out).
+    db_queue = asyncio.Queue(maxsize=TICK_QUEUE_SIZE)
+    agg_queue = asyncio.Queue(maxsize=TICK_QUEUE_SIZE)
+    strategy_candle_queue = asyncio.Queue(maxsize=CANDLE_QUEUE_SIZE)
+    candle_store_queue = asyncio.Queue(maxsize=CANDLE_QUEUE_SIZE)
+    execution_queue = asyncio.Queue(maxsize=EXECUTION_QUEUE_SIZE)
 
     # 3. Composants
     db_client = QuestDBClient(host=settings.QUESTDB_HOST, port=settings.QUESTDB_PORT)
-    ingestor = BinanceIngestor(symbols=settings.SYMBOLS, output_queue=raw_tick_queue)
-    aggregator = TimeBarAggregator(output_queue=candle_queue)
+    # Agrégateur : livraison garantie ; DB : best-effort (une DB lente ne freine pas la stratégie)
+    ingestor = BinanceIngestor(symbols=settings.SYMBOLS, output_queue=agg_queue, extra_queues=[db_queue])
+    aggregator = TimeBarAggregator(output_queue=strategy_candle_queue, extra_queues=[candle_store_queue])
     
     # Module ML (Instancié AVANT la stratégie)
     learner = OnlineLearner(
@@ -428,10 +375,9 @@ async def main():
     # 4. Lancement des Tâches
     tasks = [
         asyncio.create_task(ingestor.run(), name="ws-ingestor"),
-        asyncio.create_task(fanout_dispatcher(raw_tick_queue, db_queue, agg_queue, TICKER_SAMPLE_RATE), name="fanout-dispatcher"),
         asyncio.create_task(data_writer(db_queue, db_client), name="questdb-writer"),
         asyncio.create_task(aggregator_runner(agg_queue, aggregator), name="aggregator-runner"),
-        asyncio.create_task(candle_dispatcher(candle_queue, strategy_candle_queue, candle_store_queue), name="candle-dispatcher"),
+        asyncio.create_task(ticker_flusher(aggregator), name="ticker-flusher"),
         asyncio.create_task(candle_writer(candle_store_queue, db_client), name="candle-writer"),
         asyncio.create_task(strategy_runner(strategy_candle_queue, execution_queue, strategy), name="strategy-runner"),
         asyncio.create_task(execution_runner(execution_queue, execution_engine), name="execution-runner"),
@@ -450,9 +396,11 @@ async def main():
             task.cancel()
         await asyncio.gather(*tasks, return_exceptions=True)
         db_client.close()
+        await close_http_client()
         logger.info("👋 Fermeture propre...")
 
 if __name__ == "__main__":
     if sys.platform != "win32":
-        uvloop.install()
-    asyncio.run(main())
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
@@ -1,6 +1,6 @@
 import asyncio
 import logging
-from typing import Dict
+from typing import Dict, Sequence
 from src.models import Candle
 
 logger = logging.getLogger("Aggregator")
@@ -8,12 +8,16 @@ logger = logging.getLogger("Aggregator")
 class TimeBarAggregator:
     """
     Agrégateur de ticks en bougies temporelles (Time Bars).
-    Transforme un flux de ticks haute fréquence en bougies OHLCV de 1 seconde.
+    Transforme un flux de ticks haute fréquence en bougies OHLCV de 1 seconde, publiées directement :
+    - output_queue : livraison garantie (await put, backpressure) — ex: stratégie
+    - extra_queues : best-effort (put_nowait, bougie abandonnée si pleine) — ex: persistance DB
     """
 
-    def __init__(self, output_queue: asyncio.Queue, interval_ms: int = 1000):
+    def __init__(self, output_queue: asyncio.Queue, interval_ms: int = 1000, extra_queues: Sequence[asyncio.Queue] = ()):
         self.output_queue = output_queue
+        self.extra_queues = list(extra_queues)
         self.interval_ms = interval_ms
+        self._queue_full_logged = False
         # État par symbole : { "BTCUSDT": { "start": 123, "o": ..., "h": ..., "l": ..., "c": ..., "v": ... } }
         self.active_candles: Dict[str, dict] = {}
 
@@ -74,8 +78,17 @@ class TimeBarAggregator:
             close=c['c'],
             volume=c['v']
         )
-        # Push non-bloquant (ou await si la queue est pleine, ici await par sécurité)
+        # Stratégie : await par sécurité ; consommateurs secondaires : jamais bloquants
         await self.output_queue.put(candle)
+        for queue in self.extra_queues:
+            try:
+                queue.put_nowait(candle)
+                self._queue_full_logged = False
+            except asyncio.QueueFull:
+                # Une DB indisponible ne doit pas bloquer l'agrégation (ni, en amont, l'ingestion)
+                if not self._queue_full_logged:
+                    logger.warning(f"⚠️ File secondaire pleine (DB), bougie {symbol} ignorée.")
+                    self._queue_full_logged = True
 
     async def flush_open_candles(self):
         """
@@ -93,10 +106,11 @@ class TimeBarAggregator:
                     close=c['c'],
                     volume=c['v']
                 )
-                try:
-                    self.output_queue.put_nowait(candle)
-                except asyncio.QueueFull:
-                    logger.warning(f"⚠️ Queue pleine, bougie {symbol} ignorée pendant le flush.")
+                for queue in (self.output_queue, *self.extra_queues):
+                    try:
+                        queue.put_nowait(candle)
+                    except asyncio.QueueFull:
+                        logger.warning(f"⚠️ Queue pleine, bougie {symbol} ignorée pendant le flush.")
             except Exception as e:
                 logger.error(f"❌ Erreur lors du flush de {symbol}: {e}")
         self.active_candles.clear()
@@ -1,6 +1,7 @@
 import os
 import sys
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import List
 from dotenv import load_dotenv
@@ -42,8 +43,12 @@ class Settings:
     WATCHDOG_TIMEOUT: int = 15  # Secondes avant reconnexion WS
     CIRCUIT_BREAKER_DRAWDOWN: float = -0.05  # Arrêt si -5% session PnL
 
+@lru_cache(maxsize=1)
 def load_config() -> Settings:
-    """Charge et valide la configuration."""
+    """
+    Charge et valide la configuration.
+    Résultat mémoïsé : `load_config.cache_clear()` pour relire l'environnement (tests).
+    """
     try:
         return Settings(
             BINANCE_API_KEY=_get_env("BINANCE_API_KEY"),
@@ -38,6 +38,16 @@ class QuestDBClient:
                 # On laisse l'appelant gérer l'échec après une tentative
                 pass
 
+    @staticmethod
+    def trade_line(table: str, symbol: str, price: float, qty: float, side: str, timestamp_ms: int) -> str:
+        """Ligne ILP d'un trade (timestamp ms converti en ns)."""
+        return f"{table},symbol={symbol},side={side} price={price},qty={qty} {timestamp_ms * 1_000_000}\n"
+
+    @staticmethod
+    def ohlcv_line(table: str, symbol: str, open: float, high: float, low: float, close: float, volume: float, timestamp_ms: int) -> str:
+        """Ligne ILP d'une bougie OHLCV (timestamp ms converti en ns)."""
+        return f"{table},symbol={symbol} open={open},high={high},low={low},close={close},volume={volume} {timestamp_ms * 1_000_000}\n"
+
     async def send(self, table: str, symbol: str, price: float, qty: float, side: str, timestamp_ms: int):
         """
         Envoie une ligne de données au format ILP.
@@ -51,14 +61,11 @@ class QuestDBClient:
             side: 'buy' ou 'sell'
             timestamp_ms: Timestamp en millisecondes (sera converti en nanosecondes)
         """
-        # Conversion timestamp ms -> ns (QuestDB par défaut)
-        timestamp_ns = timestamp_ms * 1_000_000
-        
         # Construction de la ligne ILP (f-string est le plus rapide en Python)
         # Attention aux espaces : "table,tags fields timestamp\n"
         # Tags: symbol, side (indexés)
         # Fields: price, qty (non indexés)
-        line = f"{table},symbol={symbol},side={side} price={price},qty={qty} {timestamp_ns}\n"
+        line = self.trade_line(table, symbol, price, qty, side, timestamp_ms)
         
         async with self._lock:
             await self._ensure_connection()
@@ -76,10 +83,9 @@ class QuestDBClient:
         """
         Envoie une bougie (OHLCV) au format ILP.
         """
-        timestamp_ns = timestamp_ms * 1_000_000
         # Tags: symbol
         # Fields: open, high, low, close, volume
-        line = f"{table},symbol={symbol} open={open},high={high},low={low},close={close},volume={volume} {timestamp_ns}\n"
+        line = self.ohlcv_line(table, symbol, open, high, low, close, volume, timestamp_ms)
         
         async with self._lock:
             await self._ensure_connection()
@@ -90,6 +96,24 @@ class QuestDBClient:
                     logger.error(f"❌ Erreur d'écriture ILP (OHLCV): {e}")
                     self.close()
 
+    async def send_many(self, lines: list[str]):
+        """
+        Envoie un lot de lignes ILP en une seule écriture socket.
+        Le drain est fait une fois par lot (et non par ligne) : backpressure TCP sans coût par ligne.
+        """
+        if not lines:
+            return
+        buf = "".join(lines).encode('utf-8')
+        async with self._lock:
+            await self._ensure_connection()
+            if self.writer:
+                try:
+                    self.writer.write(buf)
+                    await self.writer.drain()
+                except Exception as e:
+                    logger.error(f"❌ Erreur d'écriture ILP (lot de {len(lines)}): {e}")
+                    self.close()
+
     def close(self):
         """Ferme proprement la connexion."""
         if self.writer:
@@ -1,10 +1,11 @@
 import asyncio
 import json
 import logging
+import orjson
 import time
 import websockets
 from asyncio import Queue, QueueFull
-from typing import List, Union, Optional
+from typing import List, Sequence, Union, Optional
 
 from src.config import config
 
@@ -13,13 +14,16 @@ logger = logging.getLogger("Ingestor")
 class BinanceIngestor:
     """
     Ingestor WebSocket pour Binance Futures.
-    Se connecte au flux 'aggTrade' et pousse les données normalisées dans une Queue.
+    Se connecte au flux 'aggTrade' et pousse les données normalisées directement vers ses consommateurs :
+    - output_queue : livraison garantie (await put, backpressure) — ex: agrégateur
+    - extra_queues : best-effort (put_nowait, tick abandonné si pleine) — ex: écriture DB
     Inclut un mécanisme de Watchdog pour détecter les gels de flux.
     """
 
-    def __init__(self, symbols: List[str], output_queue: Queue):
+    def __init__(self, symbols: List[str], output_queue: Queue, extra_queues: Sequence[Queue] = ()):
         self.symbols = [s.lower().replace('/', '') for s in symbols] # BTC/USDT -> btcusdt
         self.queue = output_queue
+        self.extra_queues = list(extra_queues)
         self.base_url = "wss://fstream.binance.com/stream?streams="
         self.running = False
         self._queue_full_logged = False
@@ -112,14 +116,16 @@ class BinanceIngestor:
                 'timestamp': data['T'] # Milliseconds
             }
             
-            try:
-                await self.queue.put(normalized_data)
-                self._queue_full_logged = False
-            except QueueFull:
-                # Backpressure soft : on droppe le tick le plus récent pour éviter l'OOM
-                if not self._queue_full_logged:
-                    logger.warning("⚠️ File d'ingestion pleine, tick ignoré.")
-                    self._queue_full_logged = True
+            await self.queue.put(normalized_data)
+            for queue in self.extra_queues:
+                try:
+                    queue.put_nowait(normalized_data)
+                    self._queue_full_logged = False
+                except QueueFull:
+                    # Backpressure soft : consommateur non critique en retard, tick abandonné pour lui seul
+                    if not self._queue_full_logged:
+                        logger.warning("⚠️ File secondaire pleine (DB), tick ignoré.")
+                        self._queue_full_logged = True
             
         except orjson.JSONDecodeError:
             logger.error("❌ Erreur de parsing JSON")
@@ -2,7 +2,9 @@ from dataclasses import dataclass, field
 from typing import Literal
 import uuid
 
-@dataclass(frozen=True)
+# Objet créé à chaque bougie : slots=True supprime le __dict__ par instance
+# (et fournit __getstate__/__setstate__ compatibles frozen pour copy/pickle)
+@dataclass(frozen=True, slots=True)
 class Candle:
     """Représente une bougie OHLCV agrégée."""
     symbol: str
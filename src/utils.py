@@ -1,7 +1,9 @@
 import asyncio
 import httpx
 import json
-from typing import List, Any
+import orjson
+import os
+from typing import List, Any, Optional
 import logging
 
 # Gestion gracieuse de l'absence de FastAPI pour les scripts de backtest
@@ -10,17 +12,112 @@ try:
 except ImportError:
     WebSocket = Any
 
-API_URL = "http://localhost:8000"
+# Broker pub/sub optionnel (multi-workers uvicorn) : actif seulement si BROADCAST_REDIS_URL est défini
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+# IP explicite (uvicorn écoute sur 127.0.0.1) : pas de résolution de "localhost" ni d'essai IPv6
+API_URL = "http://127.0.0.1:8000"
+
+_JSON_HEADERS = {"content-type": "application/json"}
+
+# Client HTTP partagé (keep-alive) pour le canal bot -> API, créé à la première utilisation
+_LOG_CLIENT: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Retourne le client httpx partagé, en le créant au besoin."""
+    global _LOG_CLIENT
+    if _LOG_CLIENT is None or _LOG_CLIENT.is_closed:
+        _LOG_CLIENT = httpx.AsyncClient(
+            base_url=API_URL,
+            timeout=httpx.Timeout(1.0, connect=0.1),
+            limits=httpx.Limits(max_keepalive_connections=4, max_connections=8, keepalive_expiry=30),
+            # Pas de retry transport : un envoi raté est simplement perdu (logs/PnL non critiques)
+            transport=httpx.AsyncHTTPTransport(retries=0),
+        )
+    return _LOG_CLIENT
+
+async def close_http_client():
+    """Ferme le client httpx partagé (à appeler à l'arrêt du moteur)."""
+    global _LOG_CLIENT
+    if _LOG_CLIENT is not None:
+        await _LOG_CLIENT.aclose()
+        _LOG_CLIENT = None
+
+BROADCAST_REDIS_URL = os.getenv("BROADCAST_REDIS_URL", "")
+BROADCAST_CHANNEL = "logs"
+COMMAND_CHANNEL = "commands"
 
 class LogManager:
+    """
+    Registre des clients WebSocket et diffusion des messages.
+    Avec BROADCAST_REDIS_URL, `broadcast` publie sur Redis et chaque worker
+    rediffuse à ses propres clients (les connexions restent locales au process).
+    """
     _instance = None
+    channel = BROADCAST_CHANNEL
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(LogManager, cls).__new__(cls)
             cls._instance.active_connections = []
+            cls._instance._redis = None
+            cls._instance._broker_task = None
+            cls._instance._relaying = False  # True seulement quand l'abonnement Redis est actif
         return cls._instance
 
+    async def start_broker(self):
+        """Active le broker Redis si configuré (appelé au démarrage du serveur)."""
+        if not BROADCAST_REDIS_URL or self._redis is not None:
+            return
+        if aioredis is None:
+            print("⚠️ BROADCAST_REDIS_URL défini mais redis n'est pas installé, diffusion locale uniquement.")
+            return
+        self._redis = aioredis.from_url(BROADCAST_REDIS_URL)
+        self._broker_task = asyncio.create_task(self._broker_listener())
+
+    async def stop_broker(self):
+        if self._broker_task is not None:
+            self._broker_task.cancel()
+            await asyncio.gather(self._broker_task, return_exceptions=True)
+            self._broker_task = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def _broker_listener(self):
+        """
+        Relaie les messages publiés par n'importe quel worker vers les clients locaux.
+        Se réabonne avec backoff si la connexion pub/sub tombe ; entre-temps `broadcast`
+        repasse en diffusion locale pour ne rien perdre sur ce worker.
+        """
+        backoff = 1
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                self._relaying = True
+                backoff = 1
+                async for msg in pubsub.listen():
+                    if msg.get("type") != "message":
+                        continue
+                    data = msg["data"]
+                    await self._local_broadcast(data.decode() if isinstance(data, bytes) else data)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Broker Redis ({self.channel}) indisponible: {e}. Diffusion locale, nouvel essai dans {backoff}s.")
+            finally:
+                self._relaying = False
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
     async def connect(self, websocket: Any):
         await websocket.accept()
         self.active_connections.append(websocket)
@@ -30,23 +127,51 @@ class LogManager:
             self.active_connections.remove(websocket)
 
     async def broadcast(self, message: str):
+        if self._redis is not None and self._relaying:
+            try:
+                await self._redis.publish(self.channel, message)
+                return
+            except Exception as e:
+                print(f"⚠️ Erreur publication Redis, diffusion locale: {e}")
+        await self._local_broadcast(message)
+
+    async def _local_broadcast(self, message: str):
         if not self.active_connections:
             return
-            
+
+        # Envoi concurrent : un client lent ne bloque plus les autres (coût = max et non somme)
         # Copie de la liste pour éviter les problèmes de modification pendant l'itération
-        for connection in list(self.active_connections):
-            try:
-                # Vérification défensive de l'état
-                if hasattr(connection, "client_state") and connection.client_state.value == 1:
-                    await connection.send_text(message)
-                elif not hasattr(connection, "client_state"):
-                    # Fallback si l'objet n'a pas client_state (ex: mock ou version différente)
-                    await connection.send_text(message)
-                else:
-                    self.disconnect(connection)
-            except Exception as e:
-                print(f"⚠️ Erreur Broadcast (Ignorée): {e}")
-                self.disconnect(connection)
+        # Message ASGI construit une seule fois et partagé par toutes les connexions
+        # (les frames restent en texte : les clients testent des sous-chaînes str)
+        event = {"type": "websocket.send", "text": message}
+        dead: list = []
+        await asyncio.gather(
+            *(self._safe_send(connection, message, event, dead) for connection in list(self.active_connections))
+        )
+        for connection in dead:
+            self.disconnect(connection)
+
+    async def _safe_send(self, connection: Any, message: str, event: dict, dead: list):
+        try:
+            # Vérification défensive de l'état
+            if hasattr(connection, "client_state") and connection.client_state.value == 1:
+                await connection.send(event)
+            elif not hasattr(connection, "client_state"):
+                # Fallback si l'objet n'a pas client_state (ex: mock ou version différente)
+                await connection.send_text(message)
+            else:
+                dead.append(connection)
+        except Exception as e:
+            print(f"⚠️ Erreur Broadcast (Ignorée): {e}")
+            dead.append(connection)
+
+class CommandManager(LogManager):
+    """
+    Canal dédié aux commandes moteur (ordres manuels) : frames JSON uniquement,
+    le moteur n'est réveillé que par de vraies commandes et non par le flux de logs.
+    """
+    _instance = None
+    channel = COMMAND_CHANNEL
 
 class BroadcastLogHandler(logging.Handler):
     """
@@ -70,8 +195,7 @@ class BroadcastLogHandler(logging.Handler):
 
     async def _send_log(self, message: str):
         try:
-            async with httpx.AsyncClient(timeout=1.0) as client:
-                await client.post(f"{API_URL}/logs", json={"message": message})
+            await get_http_client().post("/logs", json={"message": message})
         except Exception:
             # On ignore les erreurs de connexion à l'API pour ne pas crasher le bot
             pass
@@ -86,8 +210,13 @@ async def broadcast_event(event_type: str, data: dict):
             "data": data,
             "timestamp": int(asyncio.get_event_loop().time() * 1000)
         }
-        async with httpx.AsyncClient(timeout=0.5) as client:
-            await client.post(f"{API_URL}/events", json=payload)
+        await get_http_client().post(
+            "/events",
+            # Les prix issus de pandas sont des np.float64, refusés par orjson sans cette option
+            content=orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY),
+            headers=_JSON_HEADERS,
+            timeout=httpx.Timeout(0.5, connect=0.1),
+        )
     except Exception as e:
         # Fail silently pour ne pas bloquer le trading
         pass
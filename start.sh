@@ -51,7 +51,7 @@ if [ $? -eq 0 ]; then
     
     # Start API server in background
     echo "Starting API server..."
-    uvicorn api.server:app --host 127.0.0.1 --port 8000 &
+    uvicorn api.server:app --host 127.0.0.1 --port 8000 --loop uvloop --ws-ping-interval 20 --ws-ping-timeout 20 &
     API_PID=$!
     
     # Wait a moment for API to start
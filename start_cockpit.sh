@@ -13,7 +13,7 @@ echo "🚀 Démarrage du Trading Cockpit..."
 
 # 1. Démarrer l'API Server
 echo "📡 Démarrage de l'API Server..."
-uvicorn api.server:app --host 127.0.0.1 --port 8000 > api.log 2>&1 &
+uvicorn api.server:app --host 127.0.0.1 --port 8000 --loop uvloop --ws-ping-interval 20 --ws-ping-timeout 20 > api.log 2>&1 &
 API_PID=$!
 echo "   -> API PID: $API_PID"
 sleep 2
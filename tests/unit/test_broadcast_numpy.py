@@ -0,0 +1,44 @@
+import asyncio
+
+import numpy as np
+import orjson
+import pytest
+
+import src.utils as utils
+from src.execution import ExecutionEngine, Position
+
+
+class _FakeClient:
+    def __init__(self):
+        self.posts = []
+
+    async def post(self, url, **kwargs):
+        self.posts.append((url, kwargs))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = _FakeClient()
+    monkeypatch.setattr(utils, "get_http_client", lambda: fake)
+    return fake
+
+
+def test_broadcast_portfolio_with_numpy_prices(client, tmp_path, monkeypatch):
+    # Les prix venant des DataFrames de la stratégie sont des np.float64
+    monkeypatch.chdir(tmp_path)
+    engine = ExecutionEngine(initial_balance=1_000.0)
+    engine.portfolio.balance = np.float64(900.0)
+    engine.portfolio.positions["BTCUSDT"] = Position(
+        symbol="BTCUSDT", side="LONG", entry_price=np.float64(100.0), qty=np.float64(1.0), timestamp=0.0
+    )
+
+    asyncio.run(engine.broadcast_portfolio({"BTCUSDT": np.float64(110.0)}))
+
+    assert len(client.posts) == 1
+    url, kwargs = client.posts[0]
+    assert url == "/events"
+    event = orjson.loads(kwargs["content"])
+    assert event["type"] == "pnl"
+    assert event["data"]["balance"] == 900.0
+    assert event["data"]["positions"][0]["mark"] == 110.0
+    assert event["data"]["pnl_unrealized"] == pytest.approx(10.0)
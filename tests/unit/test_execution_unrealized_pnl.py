@@ -0,0 +1,60 @@
+import pytest
+
+from src.execution import ExecutionEngine, Position
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    # L'état du portefeuille est lu/écrit dans ./data : on isole chaque test
+    monkeypatch.chdir(tmp_path)
+    return ExecutionEngine(initial_balance=1_000.0)
+
+
+def _add(engine, symbol, side, entry, qty):
+    engine.portfolio.positions[symbol] = Position(
+        symbol=symbol, side=side, entry_price=entry, qty=qty, timestamp=0.0
+    )
+
+
+def test_empty_portfolio(engine):
+    assert engine._compute_equity() == (1_000.0, 0.0, [])
+
+
+def test_long_and_short_unrealized(engine):
+    _add(engine, "BTCUSDT", "LONG", 100.0, 2.0)
+    _add(engine, "ETHUSDT", "SHORT", 50.0, 4.0)
+
+    equity, unrealized, view = engine._compute_equity({"BTCUSDT": 110.0, "ETHUSDT": 45.0})
+
+    # LONG : (110 - 100) * 2 = 20 ; SHORT : (50 - 45) * 4 = 20
+    assert [p["pnl"] for p in view] == pytest.approx([20.0, 20.0])
+    assert unrealized == pytest.approx(40.0)
+    assert equity == pytest.approx(1_040.0)
+    assert [p["symbol"] for p in view] == ["BTCUSDT", "ETHUSDT"]
+    assert view[1] == {
+        "symbol": "ETHUSDT", "side": "SHORT", "entry": 50.0, "mark": 45.0, "qty": 4.0, "pnl": pytest.approx(20.0),
+    }
+
+
+def test_losing_positions(engine):
+    _add(engine, "BTCUSDT", "LONG", 100.0, 1.0)
+    _add(engine, "ETHUSDT", "SHORT", 50.0, 1.0)
+
+    _, unrealized, view = engine._compute_equity({"BTCUSDT": 90.0, "ETHUSDT": 60.0})
+
+    assert [p["pnl"] for p in view] == pytest.approx([-10.0, -10.0])
+    assert unrealized == pytest.approx(-20.0)
+
+
+def test_mark_fallback_order(engine):
+    _add(engine, "HINT", "LONG", 10.0, 1.0)
+    _add(engine, "MARK", "LONG", 10.0, 1.0)
+    _add(engine, "NONE", "LONG", 10.0, 1.0)
+    engine.update_mark("HINT", 11.0)
+    engine.update_mark("MARK", 12.0)
+
+    _, _, view = engine._compute_equity({"HINT": 13.0})
+
+    # price_hint > dernier mark > prix d'entrée
+    assert {p["symbol"]: p["mark"] for p in view} == {"HINT": 13.0, "MARK": 12.0, "NONE": 10.0}
+    assert {p["symbol"]: p["pnl"] for p in view} == pytest.approx({"HINT": 3.0, "MARK": 2.0, "NONE": 0.0})